@@ -3,11 +3,18 @@
 Analyze controller oscillation behavior with detailed text output
 """
 
+import math
 import numpy as np
 import sys
 from racetrack import RaceTrack
 from racecar import RaceCar
-from controller import controller, lower_controller, controller_state
+from controller import controller, controller_step, lower_controller, controller_state
+
+_RAD2DEG = 180.0 / math.pi
+
+# Status label for each packed code (VIOL-R=8, VIOL-L=4, FAR=2, OFF=1),
+# highest set bit wins
+_STATUS_LABELS = ["OK", "OFF", "FAR", "FAR"] + ["VIOL-L"] * 4 + ["VIOL-R"] * 8
 
 def analyze_oscillation(track_file, start_step=0, num_steps=100):
     """
@@ -22,10 +29,7 @@ def analyze_oscillation(track_file, start_step=0, num_steps=100):
     car = RaceCar(track.initial_state.T)
     
     # Reset controller state
-    controller_state.clear()
-    controller_state['last_idx'] = 0
-    controller_state['velocity_integral'] = 0.0
-    controller_state['velocity_prev_error'] = 0.0
+    controller_state.reset()
     
     # Skip to problematic area if requested
     for _ in range(start_step):
@@ -33,10 +37,19 @@ def analyze_oscillation(track_file, start_step=0, num_steps=100):
         control = lower_controller(car.state, desired, car.parameters)
         car.update(control)
     
-    # Tracking variables
-    steering_history = []
-    cte_history = []
-    side_history = []  # Track which side of centerline
+    # Tracking variables, one row per simulated step
+    state_history = np.empty((num_steps, 5))
+    desired_steering_history = np.empty(num_steps)
+    cte_history = np.empty(num_steps)
+    closest_history = np.empty(num_steps, dtype=np.intp)
+    severe_step = None
+    
+    # Per-segment geometry, computed once for the whole run
+    track_dirs = np.empty_like(track.centerline)
+    track_dirs[:-1] = track.centerline[1:] - track.centerline[:-1]
+    track_dirs[-1] = track.centerline[0] - track.centerline[-1]
+    width_r = track.right_width
+    width_l = track.left_width
     
     print(f"\nStarting from step {start_step}")
     print(f"Initial position: ({car.state[0]:.1f}, {car.state[1]:.1f})")
@@ -44,66 +57,58 @@ def analyze_oscillation(track_file, start_step=0, num_steps=100):
     print("Step | Pos X | Pos Y | Vel | Steer | Des.St | CTE | Side | Status")
     print("-"*70)
     
+    n_steps = 0
     for step in range(num_steps):
-        # Get control
-        desired = controller(car.state, car.parameters, track)
+        # Get control and track position in one step
+        desired_steering, desired_velocity, closest_idx, cte = controller_step(car.state, track)
+        desired = (desired_steering, desired_velocity)
         control = lower_controller(car.state, desired, car.parameters)
         
-        # Find track position
-        pos = car.state[:2]
-        distances = np.linalg.norm(track.centerline - pos, axis=1)
-        closest_idx = np.argmin(distances)
-        cte = distances[closest_idx]
-        
-        # Determine which side of centerline
-        closest_point = track.centerline[closest_idx]
-        
-        # Calculate if we're left or right of track
-        if closest_idx < len(track.centerline) - 1:
-            track_dir = track.centerline[closest_idx + 1] - track.centerline[closest_idx]
-        else:
-            track_dir = track.centerline[0] - track.centerline[closest_idx]
-        
-        to_car = pos - closest_point
-        cross_product = track_dir[0] * to_car[1] - track_dir[1] * to_car[0]
-        side = "L" if cross_product > 0 else "R"
-        
-        # Check track bounds
-        to_right = np.linalg.norm(pos - track.right_boundary[closest_idx])
-        to_left = np.linalg.norm(pos - track.left_boundary[closest_idx])
-        track_width_r = np.linalg.norm(track.right_boundary[closest_idx] - track.centerline[closest_idx])
-        track_width_l = np.linalg.norm(track.left_boundary[closest_idx] - track.centerline[closest_idx])
-        
-        if cte > track_width_r:
-            status = "VIOL-R"
-        elif cte > track_width_l:
-            status = "VIOL-L"
-        elif cte > 3.0:
-            status = "FAR"
-        elif cte > 1.5:
-            status = "OFF"
-        else:
-            status = "OK"
-        
         # Store history
-        steering_history.append(car.state[2])
-        cte_history.append(cte)
-        side_history.append(side)
-        
-        # Print every 5 steps or when status changes
-        if step % 5 == 0 or status != "OK":
-            print(f"{step+start_step:4d} | {car.state[0]:5.1f} | {car.state[1]:5.1f} | "
-                  f"{car.state[3]:4.1f} | {np.rad2deg(car.state[2]):6.1f} | "
-                  f"{np.rad2deg(desired[0]):6.1f} | {cte:4.2f} | {side:4s} | {status}")
+        state_history[step] = car.state
+        desired_steering_history[step] = desired_steering
+        cte_history[step] = cte
+        closest_history[step] = closest_idx
+        n_steps = step + 1
         
         # Update car
         car.update(control)
         
         # Check for severe issues
         if cte > 20:
-            print(f"\n⚠️ Severely off track at step {step+start_step}")
+            severe_step = step + start_step
             break
     
+    state_history = state_history[:n_steps]
+    steering_history = state_history[:, 2]
+    cte_history = cte_history[:n_steps]
+    closest_history = closest_history[:n_steps]
+    
+    # Determine which side of centerline for every step at once
+    dirs = track_dirs[closest_history]
+    to_car = state_history[:, :2] - track.centerline[closest_history]
+    cross_product = dirs[:, 0] * to_car[:, 1] - dirs[:, 1] * to_car[:, 0]
+    side_history = np.where(cross_product > 0, 1, -1).astype(np.int8)
+    side_labels = np.where(side_history > 0, "L", "R")
+    
+    # Check track bounds for every step as packed status bits
+    status_codes = ((cte_history > width_r[closest_history]).astype(np.int8) * 8
+                    + (cte_history > width_l[closest_history]).astype(np.int8) * 4
+                    + (cte_history > 3.0).astype(np.int8) * 2
+                    + (cte_history > 1.5).astype(np.int8))
+    
+    # Print every 5 steps or when status changes
+    printed = (status_codes != 0) | (np.arange(n_steps) % 5 == 0)
+    for step in np.flatnonzero(printed):
+        x, y, steering, velocity, _ = state_history[step]
+        print(f"{step+start_step:4d} | {x:5.1f} | {y:5.1f} | "
+              f"{velocity:4.1f} | {steering * _RAD2DEG:6.1f} | "
+              f"{desired_steering_history[step] * _RAD2DEG:6.1f} | {cte_history[step]:4.2f} | "
+              f"{side_labels[step]:4s} | {_STATUS_LABELS[status_codes[step]]}")
+    
+    if severe_step is not None:
+        print(f"\n⚠️ Severely off track at step {severe_step}")
+    
     # Analyze oscillation patterns
     print("\n" + "="*70)
     print("OSCILLATION METRICS")
@@ -111,16 +116,10 @@ def analyze_oscillation(track_file, start_step=0, num_steps=100):
     
     if len(steering_history) > 10:
         # Count sign changes in steering
-        sign_changes = 0
-        for i in range(1, len(steering_history)):
-            if np.sign(steering_history[i]) != np.sign(steering_history[i-1]):
-                sign_changes += 1
+        sign_changes = int(np.count_nonzero(np.diff(np.sign(steering_history)) != 0))
         
         # Count side switches
-        side_switches = 0
-        for i in range(1, len(side_history)):
-            if side_history[i] != side_history[i-1]:
-                side_switches += 1
+        side_switches = int(np.count_nonzero(np.diff(side_history) != 0))
         
         # Calculate steering variance
         steering_var = np.var(steering_history)
@@ -130,8 +129,8 @@ def analyze_oscillation(track_file, start_step=0, num_steps=100):
         print(f"Track side switches: {side_switches} ({side_switches/len(side_history)*100:.1f}%)")
         print(f"Steering variance: {steering_var:.4f}")
         print(f"CTE variance: {cte_var:.4f}")
-        print(f"Max CTE: {max(cte_history):.2f} m")
-        print(f"Avg CTE: {np.mean(cte_history):.2f} m")
+        print(f"Max CTE: {cte_history.max():.2f} m")
+        print(f"Avg CTE: {cte_history.mean():.2f} m")
         
         # Detect oscillation
         oscillation_ratio = sign_changes / len(steering_history)
@@ -5,31 +5,192 @@ Implements a two-level control architecture:
 - Lower level: PID controllers for steering and velocity
 """
 
+import math
+from collections import namedtuple
+
 import numpy as np
+from numba import njit
 from numpy.typing import ArrayLike
 from typing import Tuple
 
-# Controller state storage
-controller_state = {
-    'last_idx': 0,
-    'velocity_integral': 0.0,
-    'velocity_prev_error': 0.0,
-}
+from config import CONTROLLER_CONFIG
+
+class _CState:
+    """Controller state storage, carried between steps."""
+    
+    def __init__(self):
+        self.reset()
+    
+    def reset(self):
+        """Reset state for a new run."""
+        self.last_idx = 0
+        self.velocity_integral = 0.0
+        self.velocity_prev_error = 0.0
+        
+        # Heading sin/cos from the previous step (trig_age < 0: none yet)
+        self.heading = 0.0
+        self.sin_h = 0.0
+        self.cos_h = 1.0
+        self.trig_age = -1
+
+
+controller_state = _CState()
+
+# Tunable gains, bound once per run and passed explicitly to the controllers
+ControllerParams = namedtuple('ControllerParams', 'velocity_kp steering_kp lookahead')
+
+# velocity_kp: lower-level acceleration gain
+# steering_kp: lower-level steering-rate gain at high speed (scaled up at low speed)
+# lookahead: base Pure Pursuit lookahead distance before speed scaling (m)
+DEFAULT_PARAMS = ControllerParams(velocity_kp=1.5, steering_kp=1.5, lookahead=8.0)
+
+# Steps between exact sin/cos evaluations of the heading
+TRIG_REFRESH_STEPS = 100
+
+# Precomputed track geometry, keyed by (id(track), name)
+_geometry_cache = {}
+
+
+@njit(cache=True)
+def closest_point(x: float, y: float, track: ArrayLike, track_f32: ArrayLike,
+                  last_idx: int, window: int) -> Tuple[int, float]:
+    """
+    Windowed closest-point search around last_idx with global fallback.
+    The search compares squared distances on the float32 copy; only the
+    returned distance takes a sqrt, on the float64 track.
+    """
+    n_points = track_f32.shape[0]
+    xf = np.float32(x)
+    yf = np.float32(y)
+    
+    closest_idx = -1
+    if 2 * window + 1 < n_points:
+        best_k = 0
+        best_d2 = np.inf
+        for k in range(2 * window + 1):
+            idx = (last_idx - window + k) % n_points
+            dx = track_f32[idx, 0] - xf
+            dy = track_f32[idx, 1] - yf
+            d2 = dx * dx + dy * dy
+            if d2 < best_d2:
+                best_k = k
+                best_d2 = d2
+        if 0 < best_k < 2 * window:
+            closest_idx = (last_idx - window + best_k) % n_points
+    
+    # Global search to ensure we find the true closest point
+    if closest_idx < 0:
+        closest_idx = 0
+        min_d2 = np.inf
+        for idx in range(n_points):
+            dx = track_f32[idx, 0] - xf
+            dy = track_f32[idx, 1] - yf
+            d2 = dx * dx + dy * dy
+            if d2 < min_d2:
+                closest_idx = idx
+                min_d2 = d2
+    
+    return closest_idx, math.sqrt((track[closest_idx, 0] - x)**2 + (track[closest_idx, 1] - y)**2)
 
 
 def find_closest_point_on_track(position: ArrayLike, track: ArrayLike, 
                                 last_idx: int = 0) -> Tuple[int, float]:
     """
     Find the closest point on track to current position.
+    Searches a window around last_idx, falling back to a global search
+    when the minimum lands on the edge of the window.
     """
-    n_points = len(track)
-    
-    # Always do global search to ensure we find the true closest point
-    distances = np.linalg.norm(track - position, axis=1)
-    closest_idx = np.argmin(distances)
-    min_dist = distances[closest_idx]
-    
-    return closest_idx, min_dist
+    window = CONTROLLER_CONFIG['path_tracking']['search_radius']
+    return closest_point(position[0], position[1], track, float32_track(track),
+                         last_idx, window)
+
+
+@njit(cache=True)
+def track_limit_violation(x: float, y: float, centerline: ArrayLike,
+                          right_boundary: ArrayLike, left_boundary: ArrayLike) -> bool:
+    """
+    Whether (x, y) is past either track limit at its closest centerline point.
+    Shared by Simulator.check_track_limits and sweep.evaluate_batch, so both
+    score violations the same way; the closest point is always a global search.
+    """
+    closest_idx = 0
+    min_dist = np.inf
+    for idx in range(centerline.shape[0]):
+        dx = x - centerline[idx, 0]
+        dy = y - centerline[idx, 1]
+        dist = math.sqrt(dx * dx + dy * dy)
+        if dist < min_dist:
+            closest_idx = idx
+            min_dist = dist
+    
+    car_x = x - centerline[closest_idx, 0]
+    car_y = y - centerline[closest_idx, 1]
+    right_x = right_boundary[closest_idx, 0] - centerline[closest_idx, 0]
+    right_y = right_boundary[closest_idx, 1] - centerline[closest_idx, 1]
+    left_x = left_boundary[closest_idx, 0] - centerline[closest_idx, 0]
+    left_y = left_boundary[closest_idx, 1] - centerline[closest_idx, 1]
+    
+    right_dist = math.sqrt(right_x * right_x + right_y * right_y)
+    left_dist = math.sqrt(left_x * left_x + left_y * left_y)
+    
+    proj_right = (car_x * right_x + car_y * right_y) / right_dist if right_dist > 0 else 0.0
+    proj_left = (car_x * left_x + car_y * left_y) / left_dist if left_dist > 0 else 0.0
+    
+    return proj_right > right_dist or proj_left > left_dist
+
+
+def _track_cache(track: ArrayLike, name: str, build):
+    """
+    Return a per-track precomputed array, building it on first use.
+    Entries keep a reference to the track so a recycled id() is detected.
+    """
+    key = (id(track), name)
+    entry = _geometry_cache.get(key)
+    if entry is None or entry[0] is not track:
+        entry = (track, build(track))
+        _geometry_cache[key] = entry
+    return entry[1]
+
+
+def float32_track(track: ArrayLike) -> ArrayLike:
+    """
+    Cached float32 copy of a track, used only for distance searches.
+    """
+    return _track_cache(track, 'float32', lambda t: np.ascontiguousarray(t, dtype=np.float32))
+
+
+def _build_arc_length(track: ArrayLike) -> Tuple[ArrayLike, ArrayLike]:
+    """
+    Segment lengths (closed loop) and cumulative arc length from point 0.
+    """
+    seg = np.linalg.norm(np.diff(track, axis=0, append=track[:1]), axis=1)
+    cum = np.concatenate(([0.0], np.cumsum(seg)))
+    return seg, cum
+
+
+@njit(cache=True)
+def _lookahead_point(track: ArrayLike, seg: ArrayLike, cum_len: ArrayLike,
+                     start_idx: int, lookahead_dist: float) -> Tuple[float, float, int]:
+    """
+    Arc-length lookup of the point lookahead_dist ahead of start_idx.
+    """
+    n_points = track.shape[0]
+    
+    # Target arc length, wrapped around the closed track
+    target = cum_len[start_idx] + lookahead_dist
+    if target > cum_len[-1]:
+        target -= cum_len[-1]
+    
+    # First point whose arc length reaches the target
+    j = max(np.searchsorted(cum_len, target), 1)
+    
+    # Interpolate to get exact lookahead point
+    ratio = (target - cum_len[j - 1]) / max(seg[j - 1], 0.001)
+    ratio = min(max(ratio, 0.0), 1.0)
+    next_idx = j % n_points
+    lookahead_x = track[j - 1, 0] * (1 - ratio) + track[next_idx, 0] * ratio
+    lookahead_y = track[j - 1, 1] * (1 - ratio) + track[next_idx, 1] * ratio
+    return lookahead_x, lookahead_y, next_idx
 
 
 def find_lookahead_point(position: ArrayLike, track: ArrayLike, 
@@ -37,133 +198,79 @@ def find_lookahead_point(position: ArrayLike, track: ArrayLike,
     """
     Find a point on the track at lookahead distance ahead.
     """
-    n_points = len(track)
-    accumulated = 0.0
-    current_idx = start_idx
-    
-    for _ in range(n_points):
-        next_idx = (current_idx + 1) % n_points
-        segment_dist = np.linalg.norm(track[next_idx] - track[current_idx])
-        
-        if accumulated + segment_dist >= lookahead_dist:
-            # Interpolate to get exact lookahead point
-            ratio = (lookahead_dist - accumulated) / max(segment_dist, 0.001)
-            ratio = np.clip(ratio, 0, 1)
-            lookahead_point = track[current_idx] * (1 - ratio) + track[next_idx] * ratio
-            return lookahead_point, next_idx
-        
-        accumulated += segment_dist
-        current_idx = next_idx
-    
-    return track[current_idx], current_idx
+    seg, cum = _track_cache(track, 'arc_length', _build_arc_length)
+    lookahead_x, lookahead_y, next_idx = _lookahead_point(track, seg, cum, start_idx, lookahead_dist)
+    return np.array([lookahead_x, lookahead_y]), next_idx
 
 
-def calculate_curvature(track: ArrayLike, idx: int, window: int = 5) -> float:
+def _build_curvature(track: ArrayLike, window: int) -> ArrayLike:
     """
-    Estimate curvature at a point using neighboring points.
+    Three-point curvature estimate at every track point.
     """
-    n_points = len(track)
-    
-    idx_prev = (idx - window) % n_points
-    idx_next = (idx + window) % n_points
+    p1 = np.roll(track, window, axis=0)
+    p3 = np.roll(track, -window, axis=0)
     
-    p1 = track[idx_prev]
-    p2 = track[idx]
-    p3 = track[idx_next]
+    v1 = track - p1
+    v2 = p3 - track
     
-    # Calculate curvature using three points
-    v1 = p2 - p1
-    v2 = p3 - p2
-    
-    cross = np.cross(v1, v2)
-    denom = (np.linalg.norm(v1) * np.linalg.norm(v2)) ** 1.5
-    
-    if denom > 1e-6:
-        curvature = abs(2 * cross / denom)
-    else:
-        curvature = 0.0
+    cross = v1[:, 0] * v2[:, 1] - v1[:, 1] * v2[:, 0]
+    denom = (np.hypot(v1[:, 0], v1[:, 1]) * np.hypot(v2[:, 0], v2[:, 1])) ** 1.5
     
+    curvature = np.zeros(len(track))
+    valid = denom > 1e-6
+    curvature[valid] = np.abs(2 * cross[valid] / denom[valid])
     return curvature
 
 
-def controller(state: ArrayLike, parameters: ArrayLike, racetrack) -> ArrayLike:
+def _curvatures(track: ArrayLike, window: int = 5) -> ArrayLike:
     """
-    Main controller using Pure Pursuit for path tracking.
-    Conservative approach that prioritizes staying on track.
-    
-    Args:
-        state: [x, y, steering, velocity, heading]
-        parameters: Vehicle parameters
-        racetrack: Track object with centerline
-    
-    Returns:
-        [desired_steering, desired_velocity]
+    Cached per-point curvature of a track.
+    """
+    return _track_cache(track, f'curvature_{window}',
+                        lambda t: _build_curvature(t, window))
+
+
+def calculate_curvature(track: ArrayLike, idx: int, window: int = 5) -> float:
+    """
+    Estimate curvature at a point using neighboring points.
+    """
+    return _curvatures(track, window)[idx]
+
+
+@njit(cache=True, fastmath=True)
+def _pp_kernel(x: float, y: float, sin_h: float, cos_h: float, velocity: float,
+               lookahead_x: float, lookahead_y: float,
+               curvature: float, cte: float) -> Tuple[float, float]:
+    """
+    Pure Pursuit steering and curvature-based speed selection on scalars.
     """
-    # Extract state
-    x, y = state[0], state[1]
-    velocity = state[3]
-    heading = state[4]
-    position = np.array([x, y])
-    
-    # Use centerline as reference path
-    track = racetrack.centerline
-    
-    # Find closest point on track
-    last_idx = controller_state.get('last_idx', 0)
-    closest_idx, cross_track_error = find_closest_point_on_track(position, track, last_idx)
-    controller_state['last_idx'] = closest_idx
-    
-    # Conservative lookahead distance
-    # Longer lookahead for smoother tracking
-    base_lookahead = 8.0
-    
-    # Scale with velocity but not too much
-    velocity_factor = 0.15
-    lookahead = base_lookahead + velocity_factor * min(velocity, 30)
-    
-    # Slightly shorter lookahead when off track, but not too short
-    if cross_track_error > 2.0:
-        lookahead *= 0.8
-    elif cross_track_error > 1.0:
-        lookahead *= 0.9
-    
-    # Keep lookahead in reasonable range
-    lookahead = np.clip(lookahead, 6.0, 15.0)
-    
-    # Find lookahead point
-    lookahead_point, lookahead_idx = find_lookahead_point(position, track, closest_idx, lookahead)
-    
     # Pure Pursuit steering calculation
-    dx = lookahead_point[0] - x
-    dy = lookahead_point[1] - y
+    dx = lookahead_x - x
+    dy = lookahead_y - y
     
     # Transform to vehicle frame
-    cos_h = np.cos(heading)
-    sin_h = np.sin(heading)
     target_x = cos_h * dx + sin_h * dy
     target_y = -sin_h * dx + cos_h * dy
     
     # Calculate steering angle using standard Pure Pursuit
-    L = np.sqrt(target_x**2 + target_y**2)
+    L = math.hypot(target_x, target_y)
     if L > 0.1:
         wheelbase = 3.6
         # Standard pure pursuit formula
-        desired_steering = np.arctan(2.0 * wheelbase * target_y / (L * L))
+        desired_steering = math.atan(2.0 * wheelbase * target_y / (L * L))
         
         # Very gentle correction for cross-track error
-        if cross_track_error > 1.5:
+        if cte > 1.5:
             # Small proportional correction
-            error_correction = 0.05 * (cross_track_error - 1.5) * np.sign(target_y)
-            error_correction = np.clip(error_correction, -0.1, 0.1)
+            direction = 1.0 if target_y > 0 else -1.0 if target_y < 0 else 0.0
+            error_correction = 0.05 * (cte - 1.5) * direction
+            error_correction = min(max(error_correction, -0.1), 0.1)
             desired_steering += error_correction
     else:
         desired_steering = 0.0
     
     # Limit steering angle
-    desired_steering = np.clip(desired_steering, -0.9, 0.9)
-    
-    # Conservative speed control
-    curvature = calculate_curvature(track, lookahead_idx)
+    desired_steering = min(max(desired_steering, -0.9), 0.9)
     
     # Very conservative base speeds
     if curvature > 0.1:
@@ -176,66 +283,233 @@ def controller(state: ArrayLike, parameters: ArrayLike, racetrack) -> ArrayLike:
         target_velocity = 35.0  # Conservative max speed on straights
     
     # Further reduce speed if off track
-    if cross_track_error > 2.0:
+    if cte > 2.0:
         target_velocity = min(target_velocity, 15.0)
-    elif cross_track_error > 1.0:
+    elif cte > 1.0:
         target_velocity *= 0.85
     
     # Smooth speed transitions - don't change speed too quickly
     if velocity > 0:
         max_speed_change = 10.0  # Max 10 m/s difference from current
-        target_velocity = np.clip(target_velocity, 
-                                  velocity - max_speed_change, 
-                                  velocity + max_speed_change)
+        target_velocity = min(max(target_velocity, velocity - max_speed_change),
+                              velocity + max_speed_change)
     
-    return np.array([desired_steering, target_velocity])
+    return desired_steering, target_velocity
 
 
-def lower_controller(state: ArrayLike, desired: ArrayLike, parameters: ArrayLike) -> ArrayLike:
+@njit(cache=True)
+def _heading_trig(heading: float, prev_heading: float, prev_sin_h: float,
+                  prev_cos_h: float, trig_age: int) -> Tuple[float, float, int]:
     """
-    Lower-level controller for tracking desired steering and velocity.
-    Conservative gains for stability.
+    sin/cos of the heading, rotated incrementally from the previous step.
+    Falls back to exact evaluation for large heading changes and every
+    TRIG_REFRESH_STEPS steps to bound drift.
+    """
+    dh = heading - prev_heading
+    if dh > math.pi:
+        dh -= 2 * math.pi
+    elif dh < -math.pi:
+        dh += 2 * math.pi
+    
+    if 0 <= trig_age < TRIG_REFRESH_STEPS and abs(dh) < 1e-2:
+        # Small-angle series for the rotation, truncation error ~dh**5 / 120
+        dh2 = dh * dh
+        sin_dh = dh * (1.0 - dh2 / 6.0)
+        cos_dh = 1.0 - 0.5 * dh2 * (1.0 - dh2 / 12.0)
+        sin_h = prev_sin_h * cos_dh + prev_cos_h * sin_dh
+        cos_h = prev_cos_h * cos_dh - prev_sin_h * sin_dh
+        return sin_h, cos_h, trig_age + 1
+    
+    return math.sin(heading), math.cos(heading), 0
+
+
+@njit(cache=True)
+def track_nearest_and_lookahead(x: float, y: float, velocity: float,
+                                track: ArrayLike, track_f32: ArrayLike,
+                                seg: ArrayLike, cum_len: ArrayLike,
+                                last_idx: int, window: int,
+                                base_lookahead: float) -> Tuple[int, float, float, float, int]:
+    """
+    Closest track point and the speed-scaled lookahead point in one call.
     
-    Args:
-        state: Current vehicle state
-        desired: [desired_steering, desired_velocity]
-        parameters: Vehicle parameters
+    Returns:
+        (closest_idx, cross_track_error, lookahead_x, lookahead_y, lookahead_idx)
+    """
+    # Find closest point on track
+    closest_idx, cross_track_error = closest_point(x, y, track, track_f32, last_idx, window)
+    
+    # Conservative lookahead distance
+    # Longer lookahead for smoother tracking
+    
+    # Scale base_lookahead with velocity but not too much
+    velocity_factor = 0.15
+    lookahead = base_lookahead + velocity_factor * min(velocity, 30)
+    
+    # Slightly shorter lookahead when off track, but not too short
+    if cross_track_error > 2.0:
+        lookahead *= 0.8
+    elif cross_track_error > 1.0:
+        lookahead *= 0.9
+    
+    # Keep lookahead in reasonable range
+    lookahead = min(max(lookahead, 6.0), 15.0)
+    
+    # Find lookahead point
+    lookahead_x, lookahead_y, lookahead_idx = _lookahead_point(
+        track, seg, cum_len, closest_idx, lookahead)
+    
+    return closest_idx, cross_track_error, lookahead_x, lookahead_y, lookahead_idx
+
+
+@njit(cache=True)
+def step_kernel(x: float, y: float, heading: float, velocity: float,
+                track: ArrayLike, track_f32: ArrayLike,
+                seg: ArrayLike, cum_len: ArrayLike,
+                curvatures: ArrayLike, last_idx: int, window: int,
+                base_lookahead: float, prev_heading: float, prev_sin_h: float, prev_cos_h: float,
+                trig_age: int) -> Tuple[float, float, int, float, float, float, int]:
+    """
+    One fused upper-controller step: closest point, lookahead point,
+    curvature lookup and Pure Pursuit.
+    
+    Heading sin/cos are carried between steps (trig_age < 0 means none yet).
+    
+    Returns:
+        (desired_steering, desired_velocity, closest_idx, cross_track_error,
+         sin_h, cos_h, trig_age)
+    """
+    sin_h, cos_h, trig_age = _heading_trig(heading, prev_heading, prev_sin_h,
+                                          prev_cos_h, trig_age)
+    
+    closest_idx, cross_track_error, lookahead_x, lookahead_y, lookahead_idx = \
+        track_nearest_and_lookahead(x, y, velocity, track, track_f32, seg, cum_len,
+                                    last_idx, window, base_lookahead)
+    
+    # Conservative speed control
+    curvature = curvatures[lookahead_idx]
+    
+    desired_steering, target_velocity = _pp_kernel(
+        x, y, sin_h, cos_h, velocity, lookahead_x, lookahead_y,
+        curvature, cross_track_error)
+    
+    return (desired_steering, target_velocity, closest_idx, cross_track_error,
+            sin_h, cos_h, trig_age)
+
+
+def track_arrays(track: ArrayLike) -> Tuple[ArrayLike, ...]:
+    """
+    Cached arrays step_kernel needs for a track.
     
     Returns:
-        [steering_velocity, acceleration]
+        (track, track_f32, segment_lengths, cumulative_length, curvatures)
+    """
+    seg, cum = _track_cache(track, 'arc_length', _build_arc_length)
+    return track, float32_track(track), seg, cum, _curvatures(track)
+
+
+def controller_step(state: ArrayLike, racetrack,
+                    params: ControllerParams = DEFAULT_PARAMS) -> Tuple[float, float, int, float]:
     """
-    assert(desired.shape == (2,))
+    Run the upper controller and also report where the car is on the track.
     
-    current_steering = state[2]
-    current_velocity = state[3]
+    Args:
+        state: [x, y, steering, velocity, heading]
+        racetrack: Track object with centerline
+        params: Controller gains
+    
+    Returns:
+        (desired_steering, desired_velocity, closest_idx, cross_track_error)
+    """
+    # Use centerline as reference path
+    cs = controller_state
+    result = step_kernel(
+        state[0], state[1], state[4], state[3],
+        *track_arrays(racetrack.centerline), cs.last_idx,
+        CONTROLLER_CONFIG['path_tracking']['search_radius'], params.lookahead,
+        cs.heading, cs.sin_h, cs.cos_h, cs.trig_age)
+    cs.last_idx = result[2]
+    cs.heading = state[4]
+    cs.sin_h = result[4]
+    cs.cos_h = result[5]
+    cs.trig_age = result[6]
+    
+    return result[:4]
+
+
+def controller(state: ArrayLike, parameters: ArrayLike, racetrack,
+               params: ControllerParams = DEFAULT_PARAMS) -> Tuple[float, float]:
+    """
+    Main controller using Pure Pursuit for path tracking.
+    Conservative approach that prioritizes staying on track.
     
-    desired_steering = desired[0]
-    desired_velocity = desired[1]
+    Args:
+        state: [x, y, steering, velocity, heading]
+        parameters: Vehicle parameters
+        racetrack: Track object with centerline
+        params: Controller gains
     
+    Returns:
+        (desired_steering, desired_velocity)
+    """
+    desired_steering, target_velocity, _, _ = controller_step(state, racetrack, params)
+    return desired_steering, target_velocity
+
+
+@njit(cache=True)
+def lower_kernel(current_steering: float, current_velocity: float,
+                 desired_steering: float, desired_velocity: float,
+                 steering_kp: float, kp: float, ki: float, kd: float,
+                 velocity_integral: float, velocity_derivative: float) -> Tuple[float, float]:
+    """
+    Steering-rate and acceleration commands on scalars.
+    The velocity loop is a PID; the caller owns the integral and
+    derivative terms of the velocity error.
+    """
     # Steering control with moderate gain
     steering_error = desired_steering - current_steering
     
-    # Conservative steering gain
+    # Conservative steering gain, relative to the default high-speed gain of 1.5
+    gain_scale = steering_kp / 1.5
     if current_velocity < 10:
-        steering_gain = 2.0  # Moderate gain at low speed
+        steering_gain = 2.0 * gain_scale  # Moderate gain at low speed
     elif current_velocity < 25:
-        steering_gain = 1.8
+        steering_gain = 1.8 * gain_scale
     else:
-        steering_gain = 1.5  # Lower gain at high speed for stability
+        steering_gain = 1.5 * gain_scale  # Lower gain at high speed for stability
     
     steering_velocity = steering_gain * steering_error
-    steering_velocity = np.clip(steering_velocity, -0.4, 0.4)
+    steering_velocity = max(-0.4, min(0.4, steering_velocity))
     
-    # Velocity control - simple proportional
+    # Velocity control
     velocity_error = desired_velocity - current_velocity
-    
-    # Conservative acceleration
-    kp = 1.5  # Lower gain for smoother acceleration
-    acceleration = kp * velocity_error
+    acceleration = kp * velocity_error + ki * velocity_integral + kd * velocity_derivative
     
     # Limit acceleration more conservatively
     max_accel = 15.0  # Less than the 20 m/s² limit for smoother control
     max_decel = -15.0
-    acceleration = np.clip(acceleration, max_decel, max_accel)
+    acceleration = max(max_decel, min(max_accel, acceleration))
+    
+    return steering_velocity, acceleration
+
+
+def lower_controller(state: ArrayLike, desired: ArrayLike, parameters: ArrayLike,
+                     params: ControllerParams = DEFAULT_PARAMS) -> Tuple[float, float]:
+    """
+    Lower-level controller for tracking desired steering and velocity.
+    Conservative gains for stability.
     
-    return np.array([steering_velocity, acceleration])
\ No newline at end of file
+    Args:
+        state: Current vehicle state
+        desired: (desired_steering, desired_velocity), tuple or array
+        parameters: Vehicle parameters
+        params: Controller gains
+    
+    Returns:
+        (steering_velocity, acceleration)
+    """
+    assert(len(desired) == 2)
+    
+    # Velocity control - simple proportional
+    # Conservative acceleration (default gain 1.5 for smoother acceleration)
+    return lower_kernel(state[2], state[3], desired[0], desired[1],
+                        params.steering_kp, params.velocity_kp, 0.0, 0.0, 0.0, 0.0)
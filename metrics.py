@@ -5,29 +5,28 @@ Tracks lap times, errors, and generates performance plots
 
 import numpy as np
 import matplotlib.pyplot as plt
-from typing import List, Dict, Tuple
-import json
+from typing import Dict
+import orjson
 from datetime import datetime
 
 
 class PerformanceMetrics:
     """Track and analyze controller performance metrics."""
     
-    def __init__(self):
-        self.reset()
+    # Per-step scalar series, stored as preallocated buffers
+    SERIES = ('timestamps', 'velocities', 'accelerations', 'steering_angles',
+              'steering_velocities', 'cross_track_errors', 'heading_errors',
+              'curvatures', 'lap_progress')
+    
+    def __init__(self, capacity: int = 50_000):
+        self.reset(capacity)
         
-    def reset(self):
+    def reset(self, capacity: int = 50_000):
         """Reset all metrics for a new run."""
-        self.timestamps = []
-        self.positions = []
-        self.velocities = []
-        self.accelerations = []
-        self.steering_angles = []
-        self.steering_velocities = []
-        self.cross_track_errors = []
-        self.heading_errors = []
-        self.curvatures = []
-        self.lap_progress = []
+        self._i = 0
+        self.positions = np.empty((capacity, 2), dtype=np.float64)
+        for name in self.SERIES:
+            setattr(self, name, np.empty(capacity, dtype=np.float64))
         
         # Lap statistics
         self.lap_time = None
@@ -35,21 +34,37 @@ class PerformanceMetrics:
         self.avg_velocity = 0
         self.track_violations = 0
         self.total_distance = 0
+    
+    def __len__(self) -> int:
+        """Number of recorded steps."""
+        return self._i
+    
+    def _grow(self):
+        """Double the capacity of every buffer."""
+        self.positions = np.concatenate((self.positions, np.empty_like(self.positions)))
+        for name in self.SERIES:
+            buffer = getattr(self, name)
+            setattr(self, name, np.concatenate((buffer, np.empty_like(buffer))))
         
     def update(self, timestamp: float, state: np.ndarray, control: np.ndarray,
                cross_track_error: float = 0, heading_error: float = 0,
                curvature: float = 0, progress: float = 0):
         """Update metrics with current state and control values."""
-        self.timestamps.append(timestamp)
-        self.positions.append(state[:2].copy())
-        self.velocities.append(state[3])
-        self.steering_angles.append(state[2])
-        self.accelerations.append(control[1])
-        self.steering_velocities.append(control[0])
-        self.cross_track_errors.append(cross_track_error)
-        self.heading_errors.append(heading_error)
-        self.curvatures.append(curvature)
-        self.lap_progress.append(progress)
+        i = self._i
+        if i == len(self.timestamps):
+            self._grow()
+        
+        self.timestamps[i] = timestamp
+        self.positions[i] = state[:2]
+        self.velocities[i] = state[3]
+        self.steering_angles[i] = state[2]
+        self.accelerations[i] = control[1]
+        self.steering_velocities[i] = control[0]
+        self.cross_track_errors[i] = cross_track_error
+        self.heading_errors[i] = heading_error
+        self.curvatures[i] = curvature
+        self.lap_progress[i] = progress
+        self._i = i + 1
         
         # Update statistics
         if state[3] > self.max_velocity:
@@ -60,27 +75,28 @@ class PerformanceMetrics:
         self.lap_time = lap_time
         self.track_violations = violations
         
-        if len(self.velocities) > 0:
-            self.avg_velocity = np.mean(self.velocities)
+        n = self._i
+        if n > 0:
+            self.avg_velocity = np.mean(self.velocities[:n])
             
         # Calculate total distance
-        if len(self.positions) > 1:
-            positions = np.array(self.positions)
-            diffs = np.diff(positions, axis=0)
-            distances = np.linalg.norm(diffs, axis=1)
-            self.total_distance = np.sum(distances)
+        if n > 1:
+            diffs = np.diff(self.positions[:n], axis=0)
+            self.total_distance = np.linalg.norm(diffs, axis=1).sum()
     
     def generate_report(self) -> Dict:
         """Generate performance report dictionary."""
+        n = self._i
+        abs_cte = np.abs(self.cross_track_errors[:n]) if n else np.zeros(1)
         report = {
             'lap_time': self.lap_time,
             'max_velocity': self.max_velocity,
             'avg_velocity': self.avg_velocity,
             'track_violations': self.track_violations,
             'total_distance': self.total_distance,
-            'avg_cross_track_error': np.mean(np.abs(self.cross_track_errors)) if self.cross_track_errors else 0,
-            'max_cross_track_error': np.max(np.abs(self.cross_track_errors)) if self.cross_track_errors else 0,
-            'avg_heading_error': np.mean(np.abs(self.heading_errors)) if self.heading_errors else 0,
+            'avg_cross_track_error': abs_cte.mean(),
+            'max_cross_track_error': abs_cte.max(),
+            'avg_heading_error': np.mean(np.abs(self.heading_errors[:n])) if n else 0,
             'timestamp': datetime.now().isoformat()
         }
         return report
@@ -88,24 +104,35 @@ class PerformanceMetrics:
     def save_report(self, filename: str):
         """Save performance report to JSON file."""
         report = self.generate_report()
-        with open(filename, 'w') as f:
-            json.dump(report, f, indent=2)
+        with open(filename, 'wb') as f:
+            f.write(orjson.dumps(report, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
         print(f"Performance report saved to {filename}")
     
     def plot_metrics(self, save_path: str = None):
         """Generate comprehensive performance plots."""
-        if len(self.timestamps) == 0:
+        n = self._i
+        if n == 0:
             print("No data to plot")
             return
             
         fig, axes = plt.subplots(3, 3, figsize=(15, 12))
         fig.suptitle('Controller Performance Metrics', fontsize=16)
         
-        t = np.array(self.timestamps)
+        # Time-series panels share one x-axis
+        for ax in (axes[0, 1], axes[0, 2], axes[1, 0], axes[1, 1], axes[2, 1]):
+            ax.sharex(axes[0, 0])
+        
+        # Thin long runs to at most ~2000 plotted points per series
+        stride = max(1, n // 2000)
+        sl = slice(0, n, stride)
+        
+        t = self.timestamps[sl]
+        velocities = self.velocities[sl]
+        cross_track_errors = self.cross_track_errors[:n]
         
         # Plot 1: Velocity Profile
         ax = axes[0, 0]
-        ax.plot(t, self.velocities, 'b-', label='Velocity')
+        ax.plot(t, velocities, 'b-', label='Velocity', rasterized=True)
         ax.axhline(y=self.avg_velocity, color='r', linestyle='--', label=f'Avg: {self.avg_velocity:.1f} m/s')
         ax.set_xlabel('Time (s)')
         ax.set_ylabel('Velocity (m/s)')
@@ -115,7 +142,7 @@ class PerformanceMetrics:
         
         # Plot 2: Acceleration Profile
         ax = axes[0, 1]
-        ax.plot(t, self.accelerations, 'g-')
+        ax.plot(t, self.accelerations[sl], 'g-', rasterized=True)
         ax.axhline(y=0, color='k', linestyle='-', alpha=0.3)
         ax.set_xlabel('Time (s)')
         ax.set_ylabel('Acceleration (m/s²)')
@@ -124,7 +151,7 @@ class PerformanceMetrics:
         
         # Plot 3: Steering Angle
         ax = axes[0, 2]
-        ax.plot(t, np.rad2deg(self.steering_angles), 'r-')
+        ax.plot(t, np.rad2deg(self.steering_angles[sl]), 'r-', rasterized=True)
         ax.set_xlabel('Time (s)')
         ax.set_ylabel('Steering Angle (deg)')
         ax.set_title('Steering Angle')
@@ -132,7 +159,7 @@ class PerformanceMetrics:
         
         # Plot 4: Steering Velocity
         ax = axes[1, 0]
-        ax.plot(t, np.rad2deg(self.steering_velocities), 'm-')
+        ax.plot(t, np.rad2deg(self.steering_velocities[sl]), 'm-', rasterized=True)
         ax.set_xlabel('Time (s)')
         ax.set_ylabel('Steering Rate (deg/s)')
         ax.set_title('Steering Velocity Commands')
@@ -140,8 +167,8 @@ class PerformanceMetrics:
         
         # Plot 5: Cross-track Error
         ax = axes[1, 1]
-        if self.cross_track_errors:
-            ax.plot(t, self.cross_track_errors, 'b-')
+        if n:
+            ax.plot(t, cross_track_errors[::stride], 'b-', rasterized=True)
             ax.axhline(y=0, color='k', linestyle='-', alpha=0.3)
             ax.set_xlabel('Time (s)')
             ax.set_ylabel('Cross-track Error (m)')
@@ -150,8 +177,8 @@ class PerformanceMetrics:
         
         # Plot 6: Track Curvature vs Speed
         ax = axes[1, 2]
-        if self.curvatures:
-            ax.scatter(self.curvatures, self.velocities, alpha=0.5, s=1)
+        if n:
+            ax.scatter(self.curvatures[sl], velocities, alpha=0.5, s=1, rasterized=True)
             ax.set_xlabel('Track Curvature (1/m)')
             ax.set_ylabel('Velocity (m/s)')
             ax.set_title('Speed vs Curvature')
@@ -159,9 +186,9 @@ class PerformanceMetrics:
         
         # Plot 7: XY Trajectory
         ax = axes[2, 0]
-        if len(self.positions) > 0:
-            positions = np.array(self.positions)
-            ax.plot(positions[:, 0], positions[:, 1], 'b-', alpha=0.7)
+        if n > 0:
+            positions = self.positions[:n]
+            ax.plot(positions[::stride, 0], positions[::stride, 1], 'b-', alpha=0.7, rasterized=True)
             ax.plot(positions[0, 0], positions[0, 1], 'go', markersize=8, label='Start')
             ax.plot(positions[-1, 0], positions[-1, 1], 'ro', markersize=8, label='End')
             ax.set_xlabel('X (m)')
@@ -173,8 +200,8 @@ class PerformanceMetrics:
         
         # Plot 8: Lap Progress
         ax = axes[2, 1]
-        if self.lap_progress:
-            ax.plot(t, self.lap_progress, 'g-')
+        if n:
+            ax.plot(t, self.lap_progress[sl], 'g-', rasterized=True)
             ax.set_xlabel('Time (s)')
             ax.set_ylabel('Lap Progress (%)')
             ax.set_title('Lap Completion Progress')
@@ -192,8 +219,8 @@ Track Violations: {self.track_violations}
 Total Distance: {self.total_distance:.1f} m
 
 Tracking Performance:
-Avg Cross-track Error: {np.mean(np.abs(self.cross_track_errors)) if self.cross_track_errors else 0:.2f} m
-Max Cross-track Error: {np.max(np.abs(self.cross_track_errors)) if self.cross_track_errors else 0:.2f} m
+Avg Cross-track Error: {np.mean(np.abs(cross_track_errors)):.2f} m
+Max Cross-track Error: {np.max(np.abs(cross_track_errors)):.2f} m
 """
         ax.text(0.1, 0.5, summary_text, fontsize=10, verticalalignment='center',
                 family='monospace')
@@ -207,47 +234,36 @@ Max Cross-track Error: {np.max(np.abs(self.cross_track_errors)) if self.cross_tr
         return fig
 
 
-class MetricsRecorder:
-    """Singleton class to record metrics during simulation."""
-    
-    _instance = None
-    
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-            cls._instance.metrics = PerformanceMetrics()
-        return cls._instance
-    
-    @classmethod
-    def get_instance(cls):
-        """Get the singleton instance."""
-        if cls._instance is None:
-            cls._instance = cls()
-        return cls._instance
-    
-    def reset(self):
-        """Reset metrics for new run."""
-        self.metrics.reset()
+# Module-level recorder used during simulation
+metrics = PerformanceMetrics()
+
+
+def reset_metrics():
+    """Reset metrics for new run."""
+    metrics.reset()
+
+
+def record_update(*args, **kwargs):
+    """Update metrics."""
+    metrics.update(*args, **kwargs)
+
+
+def record_finalize(*args, **kwargs):
+    """Finalize lap."""
+    metrics.finalize_lap(*args, **kwargs)
+
+
+def save_and_plot(track_name: str):
+    """Save report and generate plots."""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    report_file = f"results/{track_name}_report_{timestamp}.json"
+    plot_file = f"results/{track_name}_plots_{timestamp}.png"
     
-    def update(self, *args, **kwargs):
-        """Update metrics."""
-        self.metrics.update(*args, **kwargs)
+    # Create results directory if it doesn't exist
+    import os
+    os.makedirs("results", exist_ok=True)
     
-    def finalize(self, *args, **kwargs):
-        """Finalize lap."""
-        self.metrics.finalize_lap(*args, **kwargs)
+    metrics.save_report(report_file)
+    metrics.plot_metrics(plot_file)
     
-    def save_and_plot(self, track_name: str):
-        """Save report and generate plots."""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        report_file = f"results/{track_name}_report_{timestamp}.json"
-        plot_file = f"results/{track_name}_plots_{timestamp}.png"
-        
-        # Create results directory if it doesn't exist
-        import os
-        os.makedirs("results", exist_ok=True)
-        
-        self.metrics.save_report(report_file)
-        self.metrics.plot_metrics(plot_file)
-        
-        return report_file, plot_file
+    return report_file, plot_file
@@ -1,6 +1,49 @@
+import math
+
 import numpy as np
+from numba import njit
 from numpy.typing import ArrayLike
 
+
+@njit(cache=True)
+def _normalize_kernel(state, input, parameters):
+    # Same as RaceCar.normalize_system: clips state in place, returns clipped input
+    state[2] = min(max(state[2], parameters[1]), parameters[4])
+    state[3] = min(max(state[3], parameters[2]), parameters[5])
+    state[4] = math.atan2(math.sin(state[4]), math.cos(state[4]))
+    u0 = min(max(input[0], parameters[7]), parameters[9])
+    u1 = min(max(input[1], parameters[8]), parameters[10])
+    return u0, u1
+
+
+@njit(cache=True)
+def _vehicle_kin_kernel(state, input, parameters):
+    u0, u1 = _normalize_kernel(state, input, parameters)
+
+    ds = np.empty(5)
+    ds[0] = state[3] * math.cos(state[4])
+    ds[1] = state[3] * math.sin(state[4])
+    ds[2] = u0
+    ds[3] = u1
+    ds[4] = (state[3]/parameters[0])*(math.tan(state[2]))
+    return ds
+
+
+@njit(cache=True)
+def rk4_step(state, input, parameters, time_step):
+    """Compiled equivalent of RaceCar.update, returning the new state."""
+    state = state.copy()
+
+    s1 = _vehicle_kin_kernel(state, input, parameters)
+    s2 = _vehicle_kin_kernel(state + time_step*(s1/2), input, parameters)
+    s3 = _vehicle_kin_kernel(state + time_step*(s2/2), input, parameters)
+    s4 = _vehicle_kin_kernel(state + time_step*s3, input, parameters)
+    state = state + time_step*0.1666*(s1 + 2*s2 + 2*s3 + s4)
+
+    _normalize_kernel(state, input, parameters)
+    return state
+
+
 class RaceCar:
 
     @staticmethod
@@ -67,6 +110,7 @@ class RaceCar:
         self.time_step = 1e-1
 
     def update(self, u : ArrayLike):
+        u = np.asarray(u)
         assert(u.shape == (2,))
 
         s1 = RaceCar.vehicle_kin(self.state, u, self.parameters)
@@ -1,3 +1,6 @@
+import os
+from functools import cached_property
+
 import numpy as np
 
 import matplotlib.path as path
@@ -12,10 +15,10 @@ class RaceTrack:
         self.centerline = np.vstack((self.centerline[-1], self.centerline, self.centerline[0]))
 
         centerline_gradient = np.gradient(self.centerline, axis=0)
-        # Unfortunate Warning Print: https://github.com/numpy/numpy/issues/26620
-        centerline_cross = np.cross(centerline_gradient, np.array([0.0, 0.0, 1.0]))
+        # Gradient crossed with +z, written out to avoid np.cross on 2D vectors
+        centerline_cross = np.column_stack((centerline_gradient[:, 1], -centerline_gradient[:, 0]))
         centerline_norm = centerline_cross*\
-            np.divide(1.0, np.linalg.norm(centerline_cross, axis=1))[:, None]
+            np.divide(1.0, np.hypot(centerline_cross[:, 0], centerline_cross[:, 1]))[:, None]
 
         centerline_norm = np.delete(centerline_norm, 0, axis=0)
         centerline_norm = np.delete(centerline_norm, -1, axis=0)
@@ -27,6 +30,37 @@ class RaceTrack:
         self.right_boundary = self.centerline[:, :2] + centerline_norm[:, :2] * np.expand_dims(data[:, 2], axis=1)
         self.left_boundary = self.centerline[:, :2] - centerline_norm[:, :2]*np.expand_dims(data[:, 3], axis=1)
 
+        self._setup()
+
+    @classmethod
+    def cache(cls, filepath : str) -> "RaceTrack":
+        # Load a track from a binary sidecar of the CSV (Montreal.csv ->
+        # Montreal.npy), memory-mapped so processes share the pages. The
+        # sidecar is written on first use and rebuilt when the CSV is newer.
+        cache_path = os.path.splitext(filepath)[0] + ".npy"
+        if (not os.path.exists(cache_path)
+                or os.path.getmtime(cache_path) < os.path.getmtime(filepath)):
+            track = cls(filepath)
+            table = np.column_stack((
+                track.centerline, track.right_boundary, track.left_boundary,
+                track.right_width, track.left_width))
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.save(f, table)
+            os.replace(tmp_path, cache_path)
+
+        # Columns: centerline, right boundary, left boundary (x, y each), right and left widths
+        table = np.load(cache_path, mmap_mode="r")
+        track = cls.__new__(cls)
+        track.centerline = table[:, 0:2]
+        track.right_boundary = table[:, 2:4]
+        track.left_boundary = table[:, 4:6]
+        track.__dict__["right_width"] = table[:, 6]
+        track.__dict__["left_width"] = table[:, 7]
+        track._setup()
+        return track
+
+    def _setup(self):
         # Compute initial position and heading
         self.initial_state = np.array([
             self.centerline[0, 0],
@@ -52,6 +86,21 @@ class RaceTrack:
         self.mpl_right_track_limit_patch = patches.PathPatch(self.mpl_right_track_limit, linestyle="--", fill=False, lw=0.2)
         self.mpl_left_track_limit_patch = patches.PathPatch(self.mpl_left_track_limit, linestyle="--", fill=False, lw=0.2)
 
+    @cached_property
+    def right_width(self) -> np.ndarray:
+        # Distance from each centerline point to the right track limit
+        return np.linalg.norm(self.right_boundary - self.centerline, axis=1)
+
+    @cached_property
+    def left_width(self) -> np.ndarray:
+        # Distance from each centerline point to the left track limit
+        return np.linalg.norm(self.left_boundary - self.centerline, axis=1)
+
+    @cached_property
+    def max_width(self) -> np.ndarray:
+        # Wider of the two sides, for single-lookup bounds checks
+        return np.maximum(self.right_width, self.left_width)
+
     def plot_track(self, axis : axes.Axes):
         axis.add_patch(self.mpl_centerline_patch)
         axis.add_patch(self.mpl_right_track_limit_patch)
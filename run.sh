@@ -7,7 +7,7 @@ echo "================================"
 
 # Check if Python dependencies are installed
 echo "Checking dependencies..."
-python3 -c "import numpy; import matplotlib" 2>/dev/null
+python3 -c "import numpy; import matplotlib; import numba; import orjson; import joblib" 2>/dev/null
 if [ $? -ne 0 ]; then
     echo "Installing required packages..."
     pip3 install --user -r requirements.txt
@@ -26,9 +26,9 @@ elif [ "$1" == "test" ]; then
 elif [ "$1" == "tune" ]; then
     if [ "$2" == "montreal" ] || [ "$2" == "ims" ]; then
         echo "Tuning controller for $2..."
-        python3 test_runner.py tune $2
+        python3 test_runner.py tune $2 $3 $4
     else
-        echo "Usage: ./run.sh tune [montreal|ims]"
+        echo "Usage: ./run.sh tune [montreal|ims] [grid|bayes|batch] [checkpoint.jsonl]"
     fi
 else
     echo "Usage: ./run.sh [montreal|ims|test|tune]"
@@ -7,11 +7,12 @@ from time import time
 
 from racetrack import RaceTrack
 from racecar import RaceCar
-from controller import lower_controller, controller
+from controller import lower_controller, controller, track_limit_violation, ControllerParams, DEFAULT_PARAMS
 
 class Simulator:
 
-    def __init__(self, rt : RaceTrack):
+    def __init__(self, rt : RaceTrack, params : ControllerParams = DEFAULT_PARAMS):
+        self.params = params
         matplotlib.rcParams["figure.dpi"] = 300
         matplotlib.rcParams["font.size"] = 8
 
@@ -20,7 +21,13 @@ class Simulator:
 
         self.axis.set_xlabel("X"); self.axis.set_ylabel("Y")
 
-        self.car = RaceCar(self.rt.initial_state.T)
+        self.reset()
+
+    def reset(self, params : ControllerParams = None):
+        # Re-initialize car and lap state in place, reusing track and figure.
+        if params is not None:
+            self.params = params
+        self.car = RaceCar(self.rt.initial_state.T.copy())
 
         self.lap_time_elapsed = 0
         self.lap_start_time = None
@@ -30,34 +37,9 @@ class Simulator:
         self.currently_violating = False
 
     def check_track_limits(self):
-        car_position = self.car.state[0:2]
-        
-        min_dist_right = float('inf')
-        min_dist_left = float('inf')
-        
-        for i in range(len(self.rt.right_boundary)):
-            dist_right = np.linalg.norm(car_position - self.rt.right_boundary[i])
-            dist_left = np.linalg.norm(car_position - self.rt.left_boundary[i])
-            
-            if dist_right < min_dist_right:
-                min_dist_right = dist_right
-            if dist_left < min_dist_left:
-                min_dist_left = dist_left
-        
-        centerline_distances = np.linalg.norm(self.rt.centerline - car_position, axis=1)
-        closest_idx = np.argmin(centerline_distances)
-        
-        to_right = self.rt.right_boundary[closest_idx] - self.rt.centerline[closest_idx]
-        to_left = self.rt.left_boundary[closest_idx] - self.rt.centerline[closest_idx]
-        to_car = car_position - self.rt.centerline[closest_idx]
-        
-        right_dist = np.linalg.norm(to_right)
-        left_dist = np.linalg.norm(to_left)
-        
-        proj_right = np.dot(to_car, to_right) / right_dist if right_dist > 0 else 0
-        proj_left = np.dot(to_car, to_left) / left_dist if left_dist > 0 else 0
-        
-        is_violating = proj_right > right_dist or proj_left > left_dist
+        is_violating = track_limit_violation(
+            self.car.state[0], self.car.state[1], self.rt.centerline,
+            self.rt.right_boundary, self.rt.left_boundary)
         
         if is_violating and not self.currently_violating:
             self.track_limit_violations += 1
@@ -78,8 +60,8 @@ class Simulator:
             self.axis.set_xlim(self.car.state[0] - 200, self.car.state[0] + 200)
             self.axis.set_ylim(self.car.state[1] - 200, self.car.state[1] + 200)
 
-            desired = controller(self.car.state, self.car.parameters, self.rt)
-            cont = lower_controller(self.car.state, desired, self.car.parameters)
+            desired = controller(self.car.state, self.car.parameters, self.rt, self.params)
+            cont = lower_controller(self.car.state, desired, self.car.parameters, self.params)
             self.car.update(cont)
             self.update_status()
             self.check_track_limits()
@@ -122,7 +104,9 @@ class Simulator:
     
         if progress <= 1.0 and self.lap_started and not self.lap_finished:
             self.lap_finished = True
-            self.lap_time_elapsed = time() - self.lap_start_time
+            # Wall-clock lap time, only when started via start()
+            if self.lap_start_time is not None:
+                self.lap_time_elapsed = time() - self.lap_start_time
 
         if not self.lap_finished and self.lap_start_time is not None:
             self.lap_time_elapsed = time() - self.lap_start_time
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Parallel PID gain sweep for the velocity loop
+Runs one independent simulation per (kp, ki, kd) triple in compiled code
+
+evaluate_batch does the same for ControllerParams candidates, scoring
+each run by simulated lap time and track limit violations
+"""
+
+import itertools
+import math
+import sys
+
+import numpy as np
+from numba import njit, prange
+
+from config import CONTROLLER_CONFIG
+from controller import (step_kernel, lower_kernel, track_limit_violation, track_arrays,
+                        DEFAULT_PARAMS)
+from racecar import RaceCar, rk4_step
+
+# Columns of the sweep report
+REPORT_COLUMNS = ('avg_cte', 'max_cte', 'sign_changes', 'steps')
+
+# Columns of the batch evaluation report
+BATCH_COLUMNS = ('lap_completed', 'lap_time', 'violations', 'steps')
+
+
+@njit(parallel=True, cache=True)
+def _sweep_kernel(gain_grid, initial_state, car_parameters, time_step,
+                  track, track_f32, seg, cum_len, curvatures, window,
+                  base_lookahead, steering_kp, integral_limit, n_steps):
+    n_configs = gain_grid.shape[0]
+    report = np.zeros((n_configs, 4))
+
+    for k in prange(n_configs):
+        kp = gain_grid[k, 0]
+        ki = gain_grid[k, 1]
+        kd = gain_grid[k, 2]
+
+        state = initial_state.copy()
+        control = np.zeros(2)
+
+        # Per-run controller state
+        last_idx = 0
+        heading = 0.0
+        sin_h = 0.0
+        cos_h = 1.0
+        trig_age = -1
+        velocity_integral = 0.0
+        velocity_prev_error = 0.0
+
+        cte_sum = 0.0
+        cte_max = 0.0
+        sign_changes = 0
+        prev_sign = 0.0
+        steps = 0
+
+        for step in range(n_steps):
+            desired_steering, desired_velocity, last_idx, cte, sin_h, cos_h, trig_age = step_kernel(
+                state[0], state[1], state[4], state[3],
+                track, track_f32, seg, cum_len, curvatures, last_idx, window,
+                base_lookahead, heading, sin_h, cos_h, trig_age)
+            heading = state[4]
+
+            # Velocity PID terms with anti-windup
+            velocity_error = desired_velocity - state[3]
+            velocity_integral = min(max(velocity_integral + velocity_error * time_step,
+                                        -integral_limit), integral_limit)
+            velocity_derivative = 0.0
+            if step > 0:
+                velocity_derivative = (velocity_error - velocity_prev_error) / time_step
+            velocity_prev_error = velocity_error
+
+            control[0], control[1] = lower_kernel(
+                state[2], state[3], desired_steering, desired_velocity,
+                steering_kp, kp, ki, kd, velocity_integral, velocity_derivative)
+
+            # Steering sign changes, as counted by analyze_oscillation
+            sign = np.sign(state[2])
+            if step > 0 and sign != prev_sign:
+                sign_changes += 1
+            prev_sign = sign
+
+            cte_sum += cte
+            cte_max = max(cte_max, cte)
+            steps += 1
+
+            state = rk4_step(state, control, car_parameters, time_step)
+
+            # Stop once severely off track
+            if cte > 20:
+                break
+
+        report[k, 0] = cte_sum / steps
+        report[k, 1] = cte_max
+        report[k, 2] = sign_changes
+        report[k, 3] = steps
+
+    return report
+
+
+@njit(parallel=True, cache=True)
+def _batch_kernel(param_grid, initial_state, car_parameters, time_step,
+                  track, track_f32, seg, cum_len, curvatures, window,
+                  right_boundary, left_boundary, n_steps):
+    n_configs = param_grid.shape[0]
+    report = np.zeros((n_configs, 4))
+    
+    for k in prange(n_configs):
+        velocity_kp = param_grid[k, 0]
+        steering_kp = param_grid[k, 1]
+        base_lookahead = param_grid[k, 2]
+        
+        state = initial_state.copy()
+        control = np.zeros(2)
+        
+        # Per-run controller state
+        last_idx = 0
+        heading = 0.0
+        sin_h = 0.0
+        cos_h = 1.0
+        trig_age = -1
+        
+        # Per-run lap state, as in Simulator
+        lap_started = False
+        lap_finished = False
+        violations = 0
+        currently_violating = False
+        steps = 0
+        
+        for step in range(n_steps):
+            desired_steering, desired_velocity, last_idx, cte, sin_h, cos_h, trig_age = step_kernel(
+                state[0], state[1], state[4], state[3],
+                track, track_f32, seg, cum_len, curvatures, last_idx, window,
+                base_lookahead, heading, sin_h, cos_h, trig_age)
+            heading = state[4]
+            
+            control[0], control[1] = lower_kernel(
+                state[2], state[3], desired_steering, desired_velocity,
+                steering_kp, velocity_kp, 0.0, 0.0, 0.0, 0.0)
+            
+            state = rk4_step(state, control, car_parameters, time_step)
+            steps += 1
+            
+            # Lap progress (Simulator.update_status)
+            progress = math.hypot(state[0] - track[0, 0], state[1] - track[0, 1])
+            if progress > 10.0:
+                lap_started = True
+            if progress <= 1.0 and lap_started:
+                lap_finished = True
+            
+            # Track limits (Simulator.check_track_limits), counted on the
+            # finishing step too, as run_test does
+            is_violating = track_limit_violation(
+                state[0], state[1], track, right_boundary, left_boundary)
+            if is_violating and not currently_violating:
+                violations += 1
+            currently_violating = is_violating
+            
+            if lap_finished:
+                break
+            
+            # Stop once severely off track
+            if cte > 20:
+                break
+        
+        report[k, 0] = lap_finished
+        report[k, 1] = steps * time_step
+        report[k, 2] = violations
+        report[k, 3] = steps
+    
+    return report
+
+
+def evaluate_batch(param_grid, racetrack, max_time: float = 200.0) -> np.ndarray:
+    """
+    Simulate every ControllerParams candidate in parallel, headless.
+    Lap time is simulated time rather than wall-clock time.
+    
+    Args:
+        param_grid: (N, 3) array of (velocity_kp, steering_kp, lookahead)
+        racetrack: RaceTrack to drive on
+        max_time: Simulated time limit per run (s)
+    
+    Returns:
+        (N, 4) array with columns BATCH_COLUMNS
+    """
+    car = RaceCar(racetrack.initial_state.copy())
+    return _batch_kernel(
+        np.ascontiguousarray(param_grid, dtype=np.float64),
+        car.state.astype(np.float64), car.parameters, car.time_step,
+        *track_arrays(racetrack.centerline),
+        CONTROLLER_CONFIG['path_tracking']['search_radius'],
+        racetrack.right_boundary, racetrack.left_boundary,
+        int(round(max_time / car.time_step)))
+
+
+def sweep(gain_grid, racetrack, n_steps: int = 1000) -> np.ndarray:
+    """
+    Simulate every gain triple in parallel.
+
+    Args:
+        gain_grid: (K, 3) array of velocity (kp, ki, kd)
+        racetrack: RaceTrack to drive on
+        n_steps: Maximum simulation steps per run
+
+    Returns:
+        (K, 4) array with columns REPORT_COLUMNS
+    """
+    car = RaceCar(racetrack.initial_state.copy())
+    return _sweep_kernel(
+        np.ascontiguousarray(gain_grid, dtype=np.float64),
+        car.state.astype(np.float64), car.parameters, car.time_step,
+        *track_arrays(racetrack.centerline),
+        CONTROLLER_CONFIG['path_tracking']['search_radius'],
+        DEFAULT_PARAMS.lookahead, DEFAULT_PARAMS.steering_kp,
+        CONTROLLER_CONFIG['velocity_controller']['integral_limit'],
+        n_steps)
+
+
+if __name__ == "__main__":
+    from racetrack import RaceTrack
+
+    track = RaceTrack(sys.argv[1] if len(sys.argv) > 1 else "./racetracks/Montreal.csv")
+    steps = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+    grid = np.array(list(itertools.product(
+        [1.0, 1.5, 2.0, 2.5, 3.0],
+        [0.0, 0.05, 0.1],
+        [0.0, 0.25, 0.5],
+    )))
+    report = sweep(grid, track, steps)
+
+    print("  kp    ki    kd | avg CTE | max CTE | sign chg | steps")
+    print("-"*56)
+    for (kp, ki, kd), (avg_cte, max_cte, sign_changes, n) in zip(grid, report):
+        print(f"{kp:4.2f}  {ki:4.2f}  {kd:4.2f} | {avg_cte:7.2f} | {max_cte:7.2f} | "
+              f"{int(sign_changes):8d} | {int(n):5d}")
+
+    # Longest run first, then lowest average CTE
+    best = int(np.lexsort((report[:, 0], -report[:, 3]))[0])
+    print(f"\nBest gains: kp={grid[best, 0]}, ki={grid[best, 1]}, kd={grid[best, 2]}")
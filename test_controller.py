@@ -3,11 +3,14 @@
 Quick test script to verify controller functionality
 """
 
+import math
 import numpy as np
 from controller import controller, lower_controller
 from racetrack import RaceTrack
 from racecar import RaceCar
 
+_RAD2DEG = 180.0 / math.pi
+
 def test_controller():
     """Test the controller without running full simulation."""
     
@@ -40,8 +43,8 @@ def test_controller():
         control = lower_controller(car.state, desired, car.parameters)
         
         # Print status
-        print(f"   {step:4d} | {car.state[3]:8.2f} | {np.rad2deg(car.state[2]):8.2f} | "
-              f"{control[1]:6.2f} | {np.rad2deg(control[0]):9.2f}")
+        print(f"   {step:4d} | {car.state[3]:8.2f} | {car.state[2] * _RAD2DEG:8.2f} | "
+              f"{control[1]:6.2f} | {control[0] * _RAD2DEG:9.2f}")
         
         # Update car state
         car.update(control)
@@ -55,20 +58,20 @@ def test_controller():
     test_state = np.array([100.0, 100.0, 0.0, 30.0, 0.0])
     desired = controller(test_state, car.parameters, track)
     control = lower_controller(test_state, desired, car.parameters)
-    print(f"   Straight line (v=30): accel={control[1]:.2f}, steer_vel={np.rad2deg(control[0]):.2f}")
+    print(f"   Straight line (v=30): accel={control[1]:.2f}, steer_vel={control[0] * _RAD2DEG:.2f}")
     
     # Test at low speed
     test_state[3] = 5.0
     desired = controller(test_state, car.parameters, track)
     control = lower_controller(test_state, desired, car.parameters)
-    print(f"   Low speed (v=5): accel={control[1]:.2f}, steer_vel={np.rad2deg(control[0]):.2f}")
+    print(f"   Low speed (v=5): accel={control[1]:.2f}, steer_vel={control[0] * _RAD2DEG:.2f}")
     
     # Test with steering angle
     test_state[2] = 0.3  # radians
     test_state[3] = 20.0
     desired = controller(test_state, car.parameters, track)
     control = lower_controller(test_state, desired, car.parameters)
-    print(f"   With steering (δ=0.3): accel={control[1]:.2f}, steer_vel={np.rad2deg(control[0]):.2f}")
+    print(f"   With steering (δ=0.3): accel={control[1]:.2f}, steer_vel={control[0] * _RAD2DEG:.2f}")
     
     print("\n✓ All tests passed!")
     return True
@@ -6,18 +6,42 @@ Tests the controller on both Montreal and IMS tracks
 
 import sys
 import os
+import math
+import logging
+import itertools
 import numpy as np
-import matplotlib.pyplot as plt
 from datetime import datetime
-import json
+import orjson
+from joblib import Parallel, delayed, effective_n_jobs
 
 from simulator import RaceTrack, Simulator
-from metrics import MetricsRecorder, PerformanceMetrics
-from config import CONTROLLER_CONFIG
+from controller import controller_state, ControllerParams, DEFAULT_PARAMS
+from sweep import evaluate_batch
+from tuning import evaluate_config
+
+# Per-iteration progress goes through logging so headless runs skip formatting it
+logger = logging.getLogger(__name__)
+_handler = logging.StreamHandler(sys.stdout)
+_handler.setFormatter(logging.Formatter("%(message)s"))
+logger.addHandler(_handler)
+logger.propagate = False
+
+# Early termination of tuning runs
+PRUNE_CHECK_INTERVAL = 50    # Iterations between score projections
+PRUNE_MARGIN = 1.2           # Stop once projected score exceeds best * margin
+PRUNE_MAX_VIOLATIONS = 50    # Stop after this many track limit violations
+PRUNE_CTE = 15.0             # Cross-track error counted as far off track (m)
+PRUNE_CTE_STEPS = 20         # Consecutive far-off-track steps before stopping
+
+# Candidates simulated together by the 'batch' tuning method
+BATCH_SIZE = 16
 
 
 def run_test(track_file: str, raceline_file: str, track_name: str, 
-             headless: bool = False, max_time: float = 300.0):
+             headless: bool = False, max_time: float = 300.0,
+             best_so_far: float = None, racetrack: RaceTrack = None,
+             simulator: Simulator = None, params: ControllerParams = None,
+             prune: bool = False):
     """
     Run a single test on a track.
     
@@ -27,6 +51,13 @@ def run_test(track_file: str, raceline_file: str, track_name: str,
         track_name: Name of the track for reporting
         headless: If True, run without GUI
         max_time: Maximum simulation time in seconds
+        best_so_far: Best tuning score seen so far; with prune, runs that
+            can no longer beat it are stopped early
+        racetrack: Already loaded track to reuse instead of track_file
+        simulator: Simulator to reset and reuse (implies its track)
+        params: Controller gains (defaults to DEFAULT_PARAMS)
+        prune: If True (tuning runs), stop clearly bad runs early with
+            status 'pruned'
     
     Returns:
         Dictionary with test results
@@ -35,13 +66,19 @@ def run_test(track_file: str, raceline_file: str, track_name: str,
     print(f"Testing on {track_name}")
     print(f"{'='*60}")
     
-    # Initialize track and simulator
-    racetrack = RaceTrack(track_file)
-    simulator = Simulator(racetrack)
+    # Initialize track and simulator, reusing any that were passed in
+    if params is None:
+        params = DEFAULT_PARAMS
+    if simulator is not None:
+        simulator.reset(params)
+        racetrack = simulator.rt
+    else:
+        if racetrack is None:
+            racetrack = RaceTrack(track_file)
+        simulator = Simulator(racetrack, params)
     
-    # Reset metrics
-    metrics_recorder = MetricsRecorder.get_instance()
-    metrics_recorder.reset()
+    # Reset controller state
+    controller_state.reset()
     
     # Run simulation
     start_time = 0
@@ -50,36 +87,80 @@ def run_test(track_file: str, raceline_file: str, track_name: str,
     
     print(f"Starting simulation (max time: {max_time}s)...")
     
-    # Simulation loop
+    # Progress is only formatted when INFO is enabled (never when headless)
+    logger.setLevel(logging.WARNING if headless else logging.INFO)
+    log_progress = logger.isEnabledFor(logging.INFO)
+    
+    # Simulation loop, with loop-invariant lookups bound to locals
     iteration = 0
-    while current_time < max_time and not simulator.lap_finished:
+    far_off_steps = 0
+    pruned = False
+    max_velocity = 0.0
+    velocity_sum = 0.0
+    next_report = 100
+    next_prune_check = PRUNE_CHECK_INTERVAL
+    sim_run = simulator.run
+    car = simulator.car
+    centerline = racetrack.centerline
+    cs = controller_state
+    for _ in range(int(round(max_time / time_step))):
         # Run one step
-        success = simulator.run()
+        success = sim_run()
         if not success:
             break
             
         # Record metrics (if you want to integrate with metrics.py)
         # This would require modifying simulator.py to expose more data
         
-        current_time += time_step
         iteration += 1
+        current_time = iteration * time_step
+        
+        # Running velocity statistics
+        state = car.state
+        velocity = state[3]
+        max_velocity = max(max_velocity, velocity)
+        velocity_sum += velocity
         
-        # Print progress every 100 iterations
-        if iteration % 100 == 0:
-            print(f"  Time: {current_time:.1f}s, "
-                  f"Velocity: {simulator.car.state[3]:.1f} m/s, "
-                  f"Violations: {simulator.track_limit_violations}")
+        if simulator.lap_finished:
+            break
+        
+        # Log progress every 100 iterations
+        if iteration == next_report:
+            next_report += 100
+            if log_progress:
+                logger.info("  Time: %.1fs, Velocity: %.1f m/s, Violations: %d",
+                            current_time, velocity,
+                            simulator.track_limit_violations)
+        
+        # Early termination of clearly bad tuning runs
+        if not prune:
+            continue
+        closest = centerline[cs.last_idx]
+        cross_track_error = math.hypot(state[0] - closest[0], state[1] - closest[1])
+        far_off_steps = far_off_steps + 1 if cross_track_error > PRUNE_CTE else 0
+        if (simulator.track_limit_violations > PRUNE_MAX_VIOLATIONS
+                or far_off_steps >= PRUNE_CTE_STEPS):
+            pruned = True
+            break
+        if iteration == next_prune_check:
+            next_prune_check += PRUNE_CHECK_INTERVAL
+            if best_so_far is not None:
+                # Same units as the score: simulated lap time plus penalties
+                projected_score = current_time + simulator.track_limit_violations * 10
+                if projected_score > best_so_far * PRUNE_MARGIN:
+                    pruned = True
+                    break
     
     # Collect results
     results = {
         'track': track_name,
         'lap_completed': simulator.lap_finished,
-        'lap_time': simulator.lap_time_elapsed if simulator.lap_finished else None,
+        'lap_time': current_time if simulator.lap_finished else None,  # simulated time
         'track_violations': simulator.track_limit_violations,
-        'max_velocity': np.max([simulator.car.state[3]]),  # Would need history
-        'avg_velocity': simulator.car.state[3],  # Approximate
-        'status': 'completed' if simulator.lap_finished else 'timeout',
-        'timestamp': datetime.now().isoformat()
+        'max_velocity': max_velocity,
+        'avg_velocity': velocity_sum / iteration if iteration else 0.0,
+        'status': 'completed' if simulator.lap_finished else 'pruned' if pruned else 'timeout',
+        'timestamp': datetime.now()  # orjson serializes datetime natively
     }
     
     print(f"\nResults for {track_name}:")
@@ -152,57 +233,190 @@ def run_all_tests():
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     results_file = f"results/test_results_{timestamp}.json"
     
-    with open(results_file, 'w') as f:
-        json.dump(all_results, f, indent=2)
+    with open(results_file, 'wb') as f:
+        f.write(orjson.dumps(all_results, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
     
     print(f"\nResults saved to: {results_file}")
     
     return all_results
 
 
-def tune_controller(track_file: str, raceline_file: str, track_name: str):
+def _tune_bayesian(track_file: str, raceline_file: str, track_name: str,
+                   n_calls: int = 25, n_initial_points: int = 8, n_jobs: int = -1):
+    """
+    Gaussian-process Bayesian optimization over the tuning space.
+    Needs scikit-optimize (pip install scikit-optimize).
+    
+    Simulations run one at a time in this process, since each sample
+    depends on the previous ones; n_jobs only parallelizes gp_minimize's
+    acquisition optimizer.
+    """
+    from skopt import gp_minimize
+    from skopt.space import Real
+    
+    space = [
+        Real(1.0, 3.0, name='velocity_kp'),
+        Real(1.5, 3.5, name='steering_kp'),
+        Real(5.0, 12.0, name='lookahead'),
+    ]
+    evaluated = []
+    
+    def objective(x):
+        scores = [score for _, score in evaluated if score != float('inf')]
+        best_so_far = min(scores) if scores else None
+        params, score = evaluate_config(*x, track_file, raceline_file, track_name,
+                                         best_so_far)
+        evaluated.append((params, score))
+        # Laps that did not finish get a large finite penalty
+        return score if score != float('inf') else 1e6
+    
+    gp_minimize(objective, space, n_calls=n_calls,
+                n_initial_points=n_initial_points, n_jobs=n_jobs)
+    return evaluated
+
+
+def _load_checkpoint(checkpoint: str) -> list:
+    """
+    (params, score) rows from a tuning checkpoint, [] if it does not exist.
+    """
+    if not os.path.exists(checkpoint):
+        return []
+    results = []
+    with open(checkpoint, 'rb') as f:
+        for line in f:
+            if line.strip():
+                row = orjson.loads(line)
+                # orjson writes inf as null
+                score = row['score'] if row['score'] is not None else float('inf')
+                results.append((row['params'], score))
+    return results
+
+
+def _append_checkpoint(checkpoint: str, results: list):
+    """
+    Append (params, score) rows to a tuning checkpoint, one JSON object per line.
+    """
+    with open(checkpoint, 'ab') as f:
+        for params, score in results:
+            f.write(orjson.dumps({'params': params, 'score': score},
+                                 option=orjson.OPT_SERIALIZE_NUMPY) + b'\n')
+
+
+def _tune_batched(track_file: str, grid: list, batch_size: int = BATCH_SIZE,
+                  checkpoint: str = None):
+    """
+    Evaluate grid points batch_size at a time in one compiled, headless
+    simulation per batch (see sweep.evaluate_batch).
+    """
+    racetrack = RaceTrack.cache(track_file)
+    results = []
+    for start in range(0, len(grid), batch_size):
+        batch_start = len(results)
+        batch = np.array(grid[start:start + batch_size], dtype=np.float64)
+        report = evaluate_batch(batch, racetrack, max_time=200.0)
+        for (v_kp, s_kp, lookahead), (completed, lap_time, violations, _) in zip(batch, report):
+            params = {
+                'velocity_kp': float(v_kp),
+                'steering_kp': float(s_kp),
+                'lookahead': float(lookahead),
+                'lap_time': float(lap_time) if completed else None,
+                'violations': int(violations)
+            }
+            score = float(lap_time + violations * 10) if completed else float('inf')
+            results.append((params, score))
+        if checkpoint is not None:
+            _append_checkpoint(checkpoint, results[batch_start:])
+    return results
+
+
+def tune_controller(track_file: str, raceline_file: str, track_name: str,
+                    n_jobs: int = -1, backend: str = 'loky', method: str = 'grid',
+                    checkpoint: str = None):
     """
     Helper function to tune controller parameters.
-    Runs multiple tests with different parameters.
+    Runs multiple tests with different parameters in parallel.
+    
+    Args:
+        n_jobs: Number of parallel simulation workers for 'grid' (-1 uses
+            all cores); for 'bayes' simulations run one at a time and this
+            only parallelizes the acquisition optimizer
+        backend: joblib process backend ('loky' or 'multiprocessing'); each
+            worker reuses one simulator and the module-level controller
+            state, so thread-based backends are not supported
+        method: 'grid' for the full grid search, 'bayes' for Bayesian
+            optimization with ~25 evaluations instead of 100, 'batch' for
+            the grid simulated BATCH_SIZE candidates per compiled call
+        checkpoint: JSONL file of evaluated grid points to resume from and
+            append to (defaults to a new results/tuning_{track}_{ts}.jsonl);
+            not supported with 'bayes'
     """
+    if backend == 'threading':
+        raise ValueError("tune_controller needs a process backend: runs in one "
+                         "process share a simulator and controller state")
+    if method == 'bayes' and checkpoint is not None:
+        raise ValueError("checkpoints are only supported for the 'grid' and "
+                         "'batch' methods")
+    
     print(f"\nTuning controller for {track_name}...")
     
-    # Parameter ranges to test
-    param_ranges = {
-        'velocity_kp': [1.0, 1.5, 2.0, 2.5, 3.0],
-        'steering_kp': [1.5, 2.0, 2.5, 3.0, 3.5],
-        'lookahead': [10.0, 15.0, 20.0, 25.0]
-    }
+    if method == 'bayes':
+        results = _tune_bayesian(track_file, raceline_file, track_name, n_jobs=n_jobs)
+    else:
+        # Parameter ranges to test
+        param_ranges = {
+            'velocity_kp': [1.0, 1.5, 2.0, 2.5, 3.0],
+            'steering_kp': [1.5, 2.0, 2.5, 3.0, 3.5],
+            'lookahead': [6.0, 8.0, 10.0, 12.0]
+        }
+        
+        # Grid search, most promising (mid-range) points first so the
+        # early-termination threshold tightens quickly
+        grid = np.array(list(itertools.product(param_ranges['velocity_kp'],
+                                               param_ranges['steering_kp'],
+                                               param_ranges['lookahead'])))
+        centers = grid.min(axis=0) + np.ptp(grid, axis=0) / 2
+        distance = (((grid - centers) / np.ptp(grid, axis=0))**2).sum(axis=1)
+        grid = grid[np.argsort(distance, kind='stable')]
+        
+        # Resume from the checkpoint, skipping grid points already evaluated
+        if checkpoint is None:
+            os.makedirs('results', exist_ok=True)
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            checkpoint = f"results/tuning_{track_name}_{timestamp}.jsonl"
+        done = _load_checkpoint(checkpoint)
+        evaluated = {(p['velocity_kp'], p['steering_kp'], p['lookahead']) for p, _ in done}
+        pending = np.array([tuple(row) not in evaluated for row in grid.tolist()], dtype=bool)
+        grid = grid[pending]
+        if done:
+            print(f"Resuming from {checkpoint}: {len(done)} evaluated, {len(grid)} left")
+        
+        if method == 'batch':
+            results = done + _tune_batched(track_file, grid, checkpoint=checkpoint)
+        else:
+            # Headless worker processes inherit this and skip GUI backend probing
+            os.environ.setdefault('MPLBACKEND', 'Agg')
+            
+            # Evaluate in worker-sized batches, passing the best score so far
+            results = done
+            scores = [score for _, score in results if score != float('inf')]
+            best_so_far = min(scores) if scores else None
+            batch_size = effective_n_jobs(n_jobs)
+            with Parallel(n_jobs=n_jobs, backend=backend) as parallel:
+                for start in range(0, len(grid), batch_size):
+                    batch_results = parallel(
+                        delayed(evaluate_config)(*row.tolist(), track_file, raceline_file,
+                                                 track_name, best_so_far)
+                        for row in grid[start:start + batch_size])
+                    _append_checkpoint(checkpoint, batch_results)
+                    results += batch_results
+                    scores = [score for _, score in results if score != float('inf')]
+                    best_so_far = min(scores) if scores else None
     
-    best_score = float('inf')
-    best_params = {}
-    
-    # Grid search (simplified - you might want more sophisticated optimization)
-    for v_kp in param_ranges['velocity_kp']:
-        for s_kp in param_ranges['steering_kp']:
-            for lookahead in param_ranges['lookahead']:
-                # Update config
-                CONTROLLER_CONFIG['velocity_controller']['kp'] = v_kp
-                CONTROLLER_CONFIG['steering_controller']['kp'] = s_kp
-                CONTROLLER_CONFIG['lookahead_distance'] = lookahead
-                
-                # Run test
-                print(f"  Testing: v_kp={v_kp}, s_kp={s_kp}, lookahead={lookahead}")
-                results = run_test(track_file, raceline_file, track_name, 
-                                 headless=True, max_time=200.0)
-                
-                # Calculate score (minimize lap time + violations)
-                if results['lap_completed']:
-                    score = results['lap_time'] + results['track_violations'] * 10
-                    if score < best_score:
-                        best_score = score
-                        best_params = {
-                            'velocity_kp': v_kp,
-                            'steering_kp': s_kp,
-                            'lookahead': lookahead,
-                            'lap_time': results['lap_time'],
-                            'violations': results['track_violations']
-                        }
+    scores = np.full(len(results), np.inf)
+    for i, (_, score) in enumerate(results):
+        scores[i] = score
+    best_i = int(np.argmin(scores))
+    best_params = results[best_i][0] if np.isfinite(scores[best_i]) else {}
     
     print(f"\nBest parameters for {track_name}:")
     print(f"  {best_params}")
@@ -214,16 +428,18 @@ if __name__ == "__main__":
     if len(sys.argv) > 1:
         if sys.argv[1] == "tune":
             # Tune controller parameters
+            method = sys.argv[3] if len(sys.argv) > 3 else 'grid'
+            checkpoint = sys.argv[4] if len(sys.argv) > 4 else None
             if len(sys.argv) > 2 and sys.argv[2] == "montreal":
                 tune_controller('./racetracks/Montreal.csv', 
                               './racetracks/Montreal_raceline.csv',
-                              'Montreal')
+                              'Montreal', method=method, checkpoint=checkpoint)
             elif len(sys.argv) > 2 and sys.argv[2] == "ims":
                 tune_controller('./racetracks/IMS.csv',
                               './racetracks/IMS_raceline.csv', 
-                              'IMS')
+                              'IMS', method=method, checkpoint=checkpoint)
             else:
-                print("Usage: python test_runner.py tune [montreal|ims]")
+                print("Usage: python test_runner.py tune [montreal|ims] [grid|bayes|batch] [checkpoint.jsonl]")
         else:
             # Run single test with visualization
             track_file = sys.argv[1]
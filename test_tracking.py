@@ -4,11 +4,28 @@ Test the tracking performance of the controller
 Shows detailed tracking metrics in text format
 """
 
+import math
 import numpy as np
 import sys
+from numba import njit
 from racetrack import RaceTrack
 from racecar import RaceCar
-from controller import controller, lower_controller, controller_state
+from controller import controller, lower_controller, controller_state, closest_point, float32_track
+
+_RAD2DEG = 180.0 / math.pi
+
+@njit(cache=True)
+def _step_metrics(x, y, centerline, centerline_f32, max_widths, prev_idx, W):
+    """
+    Closest centerline point (the controller's windowed search) and
+    track bounds check.
+    
+    Returns:
+        Tuple of (cross_track_error, closest_idx, is_violating)
+    """
+    closest_idx, cte = closest_point(x, y, centerline, centerline_f32, prev_idx, W)
+    is_violating = cte > max_widths[closest_idx]
+    return cte, closest_idx, is_violating
 
 def test_tracking(track_file, max_steps=200):
     """Run tracking test and output results."""
@@ -22,15 +39,7 @@ def test_tracking(track_file, max_steps=200):
     car = RaceCar(track.initial_state.T)
     
     # Reset controller state
-    controller_state.clear()
-    controller_state.update({
-        'velocity_integral': 0.0,
-        'velocity_prev_error': 0.0,
-        'steering_integral': 0.0,
-        'steering_prev_error': 0.0,
-        'closest_point_idx': 0,
-        'lap_progress': 0.0,
-    })
+    controller_state.reset()
     
     # Tracking metrics
     max_cross_track = 0
@@ -38,6 +47,22 @@ def test_tracking(track_file, max_steps=200):
     violations = 0
     lap_complete = False
     
+    # Closest-point search window around the previous index, and per-point track widths
+    window = 30
+    prev_idx = 0
+    centerline = track.centerline
+    centerline_f32 = float32_track(centerline)
+    max_widths = np.ascontiguousarray(track.max_width, dtype=np.float64)
+    start_x, start_y = track.initial_state[0], track.initial_state[1]
+    
+    # Per-step history, printed after the run
+    pos_hist = np.empty((max_steps, 2))
+    velocity_hist = np.empty(max_steps)
+    steering_hist = np.empty(max_steps)
+    cte_hist = np.empty(max_steps)
+    violating_hist = np.empty(max_steps, dtype=np.bool_)
+    end_message = None
+    
     print(f"Track: {len(track.centerline)} points")
     print(f"Initial state: {car.state}")
     print("\nStarting simulation...")
@@ -48,19 +73,12 @@ def test_tracking(track_file, max_steps=200):
         desired = controller(car.state, car.parameters, track)
         control = lower_controller(car.state, desired, car.parameters)
         
-        # Check position relative to track
-        pos = car.state[:2]
-        distances = np.linalg.norm(track.centerline - pos, axis=1)
-        closest_idx = np.argmin(distances)
-        cross_track_error = distances[closest_idx]
-        
-        # Check if within track bounds
-        to_right = np.linalg.norm(pos - track.right_boundary[closest_idx])
-        to_left = np.linalg.norm(pos - track.left_boundary[closest_idx])
-        track_width_r = np.linalg.norm(track.right_boundary[closest_idx] - track.centerline[closest_idx])
-        track_width_l = np.linalg.norm(track.left_boundary[closest_idx] - track.centerline[closest_idx])
+        x, y, steering, velocity = car.state[0], car.state[1], car.state[2], car.state[3]
         
-        is_violating = cross_track_error > max(track_width_r, track_width_l)
+        # Check position relative to track bounds
+        cross_track_error, closest_idx, is_violating = _step_metrics(
+            x, y, centerline, centerline_f32, max_widths, prev_idx, window)
+        prev_idx = closest_idx
         
         # Update metrics
         max_cross_track = max(max_cross_track, cross_track_error)
@@ -68,30 +86,41 @@ def test_tracking(track_file, max_steps=200):
         if is_violating:
             violations += 1
         
-        # Print status every 10 steps
-        if step % 10 == 0:
-            print(f"Step {step:3d}: Pos=({car.state[0]:6.1f}, {car.state[1]:6.1f}) "
-                  f"V={car.state[3]:5.1f} m/s "
-                  f"δ={np.rad2deg(car.state[2]):5.1f}° "
-                  f"CTE={cross_track_error:4.2f} m "
-                  f"{'VIOLATION' if is_violating else 'OK'}")
+        # Record status
+        pos_hist[step, 0] = x
+        pos_hist[step, 1] = y
+        velocity_hist[step] = velocity
+        steering_hist[step] = steering
+        cte_hist[step] = cross_track_error
+        violating_hist[step] = is_violating
         
         # Update car
         car.update(control)
         
         # Check lap completion (back near start)
         if step > 50:  # After initial movement
-            dist_to_start = np.linalg.norm(car.state[:2] - track.initial_state[:2])
-            if dist_to_start < 5.0 and car.state[3] > 5.0:
+            x, y, velocity = car.state[0], car.state[1], car.state[3]
+            dist_to_start = math.hypot(x - start_x, y - start_y)
+            if dist_to_start < 5.0 and velocity > 5.0:
                 lap_complete = True
-                print(f"\n✓ LAP COMPLETE at step {step}!")
+                end_message = f"\n✓ LAP COMPLETE at step {step}!"
                 break
         
         # Safety check
         if cross_track_error > 20:
-            print(f"\n✗ Too far off track at step {step}!")
+            end_message = f"\n✗ Too far off track at step {step}!"
             break
     
+    # Status every 10 steps
+    for i in range(0, step + 1, 10):
+        print(f"Step {i:3d}: Pos=({pos_hist[i, 0]:6.1f}, {pos_hist[i, 1]:6.1f}) "
+              f"V={velocity_hist[i]:5.1f} m/s "
+              f"δ={steering_hist[i] * _RAD2DEG:5.1f}° "
+              f"CTE={cte_hist[i]:4.2f} m "
+              f"{'VIOLATION' if violating_hist[i] else 'OK'}")
+    if end_message is not None:
+        print(end_message)
+    
     # Final report
     print("-"*60)
     print("RESULTS:")
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Tuning checkpoint tests (pytest)
+Simulations are replaced by a stub scorer, so these run in milliseconds
+"""
+
+import numpy as np
+
+import test_runner
+from test_runner import _append_checkpoint, _load_checkpoint, tune_controller
+
+TRACK = './racetracks/Montreal.csv'
+
+
+def _params(v_kp, s_kp, lookahead, lap_time=None, violations=0):
+    return {'velocity_kp': v_kp, 'steering_kp': s_kp, 'lookahead': lookahead,
+            'lap_time': lap_time, 'violations': violations}
+
+
+def _stub_evaluate(calls):
+    """Scorer that finishes a lap only for lookahead 8 and records its calls."""
+    def evaluate(v_kp, s_kp, lookahead, track_file, raceline_file, track_name,
+                 best_so_far=None):
+        calls.append((v_kp, s_kp, lookahead))
+        if lookahead != 8.0:
+            return _params(v_kp, s_kp, lookahead, violations=3), float('inf')
+        lap_time = 100.0 / s_kp
+        return _params(v_kp, s_kp, lookahead, lap_time, 1), lap_time + 10
+    return evaluate
+
+
+def test_checkpoint_roundtrip(tmp_path):
+    """Completed and unfinished rows survive a checkpoint write and reload."""
+    checkpoint = str(tmp_path / "tuning.jsonl")
+    completed = _params(2.0, 2.5, 8.0, 95.5, 2)
+    unfinished = _params(2.0, 2.5, 6.0)
+    # Batch scores come out of the kernel report as numpy scalars
+    _append_checkpoint(checkpoint, [(completed, np.float64(115.5)),
+                                    (unfinished, float('inf'))])
+    assert _load_checkpoint(checkpoint) == [(completed, 115.5),
+                                            (unfinished, float('inf'))]
+
+
+def test_resume_skips_evaluated_points(tmp_path, monkeypatch):
+    """A resumed grid run only evaluates points missing from the checkpoint."""
+    checkpoint = str(tmp_path / "tuning.jsonl")
+    done = [(_params(2.0, 2.5, 8.0, 40.0, 1), 50.0),
+            (_params(1.0, 1.5, 6.0, violations=9), float('inf'))]
+    _append_checkpoint(checkpoint, done)
+    
+    calls = []
+    monkeypatch.setattr(test_runner, 'evaluate_config', _stub_evaluate(calls))
+    tune_controller(TRACK, '', 'Montreal', n_jobs=1, checkpoint=checkpoint)
+    
+    assert len(calls) == 100 - len(done)
+    assert (2.0, 2.5, 8.0) not in calls and (1.0, 1.5, 6.0) not in calls
+    assert len(_load_checkpoint(checkpoint)) == 100
+
+
+def test_inf_scores_survive_resume(tmp_path, monkeypatch):
+    """Unfinished runs are written as null and reloaded as inf, not as a best score."""
+    checkpoint = str(tmp_path / "tuning.jsonl")
+    calls = []
+    monkeypatch.setattr(test_runner, 'evaluate_config', _stub_evaluate(calls))
+    best = tune_controller(TRACK, '', 'Montreal', n_jobs=1, checkpoint=checkpoint)
+    assert best == _params(best['velocity_kp'], 3.5, 8.0, 100.0 / 3.5, 1)
+    
+    scores = [score for _, score in _load_checkpoint(checkpoint)]
+    assert scores.count(float('inf')) == 75
+    assert b'"score":null' in open(checkpoint, 'rb').read()
+    
+    # Fully evaluated checkpoint: nothing reruns and the best is unchanged
+    calls.clear()
+    assert tune_controller(TRACK, '', 'Montreal', n_jobs=1, checkpoint=checkpoint) == best
+    assert calls == []
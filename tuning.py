@@ -0,0 +1,60 @@
+"""
+Per-process tuning helpers for test_runner.tune_controller
+Kept in an importable module so joblib workers can resolve them by name
+"""
+
+from simulator import RaceTrack, Simulator
+from controller import ControllerParams
+
+# Track file -> simulator shared by every tuning run in this process
+_simulators = {}
+
+
+def tuning_simulator(track_file: str) -> Simulator:
+    """
+    Track and simulator shared by every tuning run in this process.
+    """
+    simulator = _simulators.get(track_file)
+    if simulator is None:
+        simulator = _simulators[track_file] = Simulator(RaceTrack.cache(track_file))
+    return simulator
+
+
+def evaluate_config(v_kp: float, s_kp: float, lookahead: float,
+                    track_file: str, raceline_file: str, track_name: str,
+                    best_so_far: float = None):
+    """
+    Run one tuning configuration and score it (lower is better).
+    Safe to call from a worker process.
+    
+    Returns:
+        (params, score) where score is inf if the lap was not completed
+    """
+    # Imported here: test_runner imports this module at load time
+    from test_runner import run_test
+    
+    # Bind the gains once and pass them down, leaving shared config untouched
+    gains = ControllerParams(velocity_kp=v_kp, steering_kp=s_kp, lookahead=lookahead)
+    
+    # Run test
+    print(f"  Testing: v_kp={v_kp}, s_kp={s_kp}, lookahead={lookahead}")
+    results = run_test(track_file, raceline_file, track_name,
+                       headless=True, max_time=200.0, best_so_far=best_so_far,
+                       simulator=tuning_simulator(track_file), params=gains,
+                       prune=True)
+    
+    params = {
+        'velocity_kp': v_kp,
+        'steering_kp': s_kp,
+        'lookahead': lookahead,
+        'lap_time': results['lap_time'],
+        'violations': results['track_violations']
+    }
+    
+    # Calculate score (minimize lap time + violations)
+    if results['lap_completed']:
+        score = results['lap_time'] + results['track_violations'] * 10
+    else:
+        score = float('inf')
+    
+    return params, score